@@ -4,11 +4,152 @@ Use this version to test the interface without API credits
 """
 
 import os
-import PyPDF2
+import multiprocessing
+import fitz  # PyMuPDF
 import json
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import time
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+# Bump when analysis output changes so cached results are invalidated
+ANALYZER_VERSION = "3"
+
+# Set MOCK_SIMULATE_LATENCY=1 to restore the fake "processing" delays
+SIMULATE_LATENCY = os.getenv("MOCK_SIMULATE_LATENCY") == "1"
+
+# Statistics patterns fused into one alternation, compiled once at import time.
+# Each branch names its value group so matches can be dispatched on lastgroup.
+# The earliest matching branch claims overlapping text, so the p/n value groups refuse
+# a number followed by "%" ("n = 30%" is read as a percentage, not a sample size).
+_STATS_PATTERN = re.compile(
+    r'(?:[pP]\s*[=<>]|p-value\s*[=:])\s*(?P<p>[0-9.]+)(?![0-9.]|\s*%)'
+    r'|(?:[Nn]\s*=|(?:sample size|participants|subjects)\s*[=:])\s*(?P<n>\d+)(?!\d|\s*%)'
+    r'|(?P<pct>\d+\.?\d*)\s*%'
+)
+
+# Maximum number of unique values kept per statistic type
+_MAX_P_VALUES = 10
+_MAX_SAMPLE_SIZES = 10
+_MAX_PERCENTAGES = 20
+
+
+# Parallel extraction only engages for documents with at least this many pages
+_PARALLEL_MIN_PAGES = 8
+
+# Upper bound on worker processes for one parallel extraction
+_MAX_PAGE_WORKERS = 4
+
+
+def _open_pdf(pdf_path: Optional[str], pdf_bytes: Optional[bytes]) -> "fitz.Document":
+    """Open a PDF from bytes if given, otherwise from a file path"""
+    if pdf_bytes is not None:
+        return fitz.open(stream=pdf_bytes, filetype="pdf")
+    return fitz.open(pdf_path)
+
+
+def _extract_page_range(args: tuple) -> List[str]:
+    """Worker: extract text for pages [start, stop) of a PDF"""
+    pdf_path, pdf_bytes, start, stop = args
+    with _open_pdf(pdf_path, pdf_bytes) as doc:
+        return [doc[i].get_text() for i in range(start, stop)]
+
+
+def _extract_pages_parallel(pdf_path: Optional[str], pdf_bytes: Optional[bytes], page_count: int) -> str:
+    """Extract all pages using one contiguous page range per worker process
+
+    Starts a short-lived spawn pool per call. Calling it from inside another pool's worker
+    works but oversubscribes the CPU (e.g. 4 x 4 processes under app.py's get_pdf_pool).
+    """
+    workers = min(os.cpu_count() or 1, _MAX_PAGE_WORKERS, page_count)
+    chunk = -(-page_count // workers)  # ceil division
+    ranges = [(pdf_path, pdf_bytes, start, min(start + chunk, page_count))
+              for start in range(0, page_count, chunk)]
+    
+    # Spawn rather than fork, so no MuPDF or server-thread state is copied into workers
+    with ProcessPoolExecutor(max_workers=len(ranges), mp_context=multiprocessing.get_context("spawn")) as pool:
+        pages = [page for page_range in pool.map(_extract_page_range, ranges) for page in page_range]
+    
+    return "\n".join(pages)
+
+
+# Module-level so it can be submitted to a process pool without pickling an analyzer instance
+def extract_pdf_text(pdf_path: Optional[str] = None, max_chars: Optional[int] = 20000,
+                     pdf_bytes: Optional[bytes] = None, parallel: bool = False) -> str:
+    """Extract text from a PDF file or in-memory PDF bytes, stopping once max_chars is reached (None = all pages)
+
+    parallel=True extracts every page of long documents in worker processes and ignores max_chars.
+    """
+    text = ""
+    try:
+        with _open_pdf(pdf_path, pdf_bytes) as doc:
+            page_count = doc.page_count
+            if not (parallel and page_count >= _PARALLEL_MIN_PAGES):
+                pages = []
+                length = 0
+                for page in doc:
+                    page_text = page.get_text()
+                    pages.append(page_text)
+                    length += len(page_text) + 1
+                    if max_chars is not None and length >= max_chars:
+                        break
+                return "\n".join(pages)
+        
+        # The document is closed before the worker processes start
+        text = _extract_pages_parallel(pdf_path, pdf_bytes, page_count)
+    except Exception as e:
+        print(f"Error extracting PDF: {e}")
+        return ""
+    
+    return text
+
+
+@lru_cache(maxsize=128)
+def _extract_stats_cached(text: str) -> tuple:
+    """Scan text for statistics; returns immutable tuples so cached results can be shared"""
+    
+    # Insertion-ordered dicts dedup inline; each type stops growing at its cap
+    p_values = {}
+    sample_sizes = {}
+    percentages = {}
+    min_p = None
+    
+    # Single pass over all statistic types
+    for match in _STATS_PATTERN.finditer(text):
+        kind = match.lastgroup
+        value = match.group(kind)
+        try:
+            if kind == 'p':
+                if len(p_values) >= _MAX_P_VALUES:
+                    continue
+                p_val = float(value)
+                if 0 <= p_val <= 1.0:
+                    p_values[p_val] = None
+                    if min_p is None or p_val < min_p:
+                        min_p = p_val
+            elif kind == 'n':
+                if len(sample_sizes) >= _MAX_SAMPLE_SIZES:
+                    continue
+                n_val = int(value)
+                if n_val > 0 and n_val < 1000000:  # Reasonable range
+                    sample_sizes[n_val] = None
+            else:
+                if len(percentages) >= _MAX_PERCENTAGES:
+                    continue
+                pct_val = float(value)
+                if 0 <= pct_val <= 100:
+                    percentages[pct_val] = None
+        except ValueError:
+            continue
+        
+        # Every type is at its cap, so the rest of the text cannot change the result
+        if (len(percentages) >= _MAX_PERCENTAGES and len(p_values) >= _MAX_P_VALUES
+                and len(sample_sizes) >= _MAX_SAMPLE_SIZES):
+            break
+    
+    return tuple(sample_sizes), tuple(p_values), tuple(percentages), min_p
+
 
 class ResearchPaperAnalyzer:
     """Analyzes research papers - MOCK VERSION"""
@@ -18,31 +159,21 @@ class ResearchPaperAnalyzer:
         self.api_key = api_key
         print("🧪 Running in MOCK MODE - Using sample data instead of real AI")
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from PDF file"""
-        text = ""
-        try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-        except Exception as e:
-            print(f"Error extracting PDF: {e}")
-            return ""
-        
-        return text
+    def extract_text_from_pdf(self, pdf_path: Optional[str] = None, max_chars: Optional[int] = 20000,
+                              pdf_bytes: Optional[bytes] = None, parallel: bool = False) -> str:
+        """Extract text from a PDF file or in-memory PDF bytes (see extract_pdf_text)"""
+        return extract_pdf_text(pdf_path, max_chars, pdf_bytes, parallel)
     
     def generate_summary(self, text: str) -> Dict[str, Any]:
         """Generate MOCK summary of the paper"""
         
-        # Simulate processing time
-        time.sleep(2)
+        # Simulate processing time (opt-in)
+        if SIMULATE_LATENCY:
+            time.sleep(2)
         
-        # Try to extract title from first few lines
-        lines = text.split('\n')
-        potential_title = lines[0][:100] if lines else "Research Paper Analysis"
+        # Try to extract title from the first line (without splitting the whole text)
+        first_newline = text.find('\n')
+        potential_title = (text[:first_newline] if first_newline != -1 else text)[:100]
         
         # Create mock summary based on actual text
         return {
@@ -63,8 +194,9 @@ class ResearchPaperAnalyzer:
     def extract_statistics(self, text: str) -> Dict[str, Any]:
         """Extract statistical information from paper using REGEX"""
         
-        # Simulate processing time
-        time.sleep(1)
+        # Simulate processing time (opt-in)
+        if SIMULATE_LATENCY:
+            time.sleep(1)
         
         # Use regex to find actual statistics in the text
         stats = self._regex_extract_stats(text)
@@ -80,63 +212,24 @@ class ResearchPaperAnalyzer:
         return stats
     
     def _regex_extract_stats(self, text: str) -> Dict[str, Any]:
-        """Extract statistics using regex"""
-        
-        # Extract p-values
-        p_values = []
-        p_patterns = [
-            r'p\s*[=<>]\s*([0-9.]+)',
-            r'P\s*[=<>]\s*([0-9.]+)',
-            r'p-value\s*[=:]\s*([0-9.]+)'
-        ]
-        for pattern in p_patterns:
-            matches = re.findall(pattern, text[:5000])  # Only first 5000 chars
-            for p in matches:
-                try:
-                    p_val = float(p)
-                    if 0 <= p_val <= 1.0:
-                        p_values.append(p_val)
-                except:
-                    pass
-        
-        # Extract sample sizes
-        sample_sizes = []
-        n_patterns = [
-            r'[Nn]\s*=\s*(\d+)',
-            r'sample size\s*[=:]\s*(\d+)',
-            r'participants\s*[=:]\s*(\d+)',
-            r'subjects\s*[=:]\s*(\d+)'
-        ]
-        for pattern in n_patterns:
-            matches = re.findall(pattern, text[:5000])
-            for n in matches:
-                try:
-                    n_val = int(n)
-                    if n_val > 0 and n_val < 1000000:  # Reasonable range
-                        sample_sizes.append(n_val)
-                except:
-                    pass
-        
-        # Extract percentages
-        percentages = []
-        perc_matches = re.findall(r'(\d+\.?\d*)\s*%', text[:5000])
-        for p in perc_matches:
-            try:
-                p_val = float(p)
-                if 0 <= p_val <= 100:
-                    percentages.append(p_val)
-            except:
-                pass
+        """Extract statistics using regex (memoized on the scanned prefix)"""
+        
+        sample_sizes, p_values, percentages, min_p = _extract_stats_cached(text[:5000])
         
         return {
-            "sample_sizes": list(set(sample_sizes))[:10] if sample_sizes else [],
-            "p_values": list(set(p_values))[:10] if p_values else [],
-            "percentages": list(set(percentages))[:20] if percentages else [],
-            "confidence_intervals": []
+            "sample_sizes": list(sample_sizes),
+            "p_values": list(p_values),
+            "percentages": list(percentages),
+            "confidence_intervals": [],
+            "min_p_value": min_p
         }
     
     def analyze_statistical_significance(self, stats: Dict) -> Dict[str, Any]:
-        """Analyze if results are statistically significant"""
+        """Analyze if results are statistically significant
+
+        stats["min_p_value"], when present, must be the value produced by _regex_extract_stats
+        (i.e. min(stats["p_values"])); it is trusted as-is. Pass None to have it recomputed.
+        """
         
         analysis = {
             "is_significant": False,
@@ -148,7 +241,10 @@ class ResearchPaperAnalyzer:
         p_values = stats.get("p_values", [])
         
         if p_values:
-            min_p = min(p_values)
+            # Reuse the minimum tracked during extraction (see docstring for the contract)
+            min_p = stats.get("min_p_value")
+            if min_p is None:
+                min_p = min(p_values)
             analysis["min_p_value"] = min_p
             analysis["is_significant"] = min_p < 0.05
             
@@ -184,6 +280,9 @@ class ResearchPaperAnalyzer:
             "papers": []
         }
         
+        total_sample_size = 0
+        significant_count = 0
+        
         for paper in papers_data:
             paper_summary = {
                 "title": paper.get("summary", {}).get("title", "Unknown"),
@@ -200,15 +299,18 @@ class ResearchPaperAnalyzer:
             
             p_values = stats.get("p_values", [])
             if p_values:
-                paper_summary["min_p_value"] = min(p_values)
-                paper_summary["is_significant"] = min(p_values) < 0.05
+                min_p = min(p_values)
+                paper_summary["min_p_value"] = min_p
+                paper_summary["is_significant"] = min_p < 0.05
             
             comparison["papers"].append(paper_summary)
+            total_sample_size += paper_summary["sample_size"]
+            significant_count += paper_summary["is_significant"]
         
         # Calculate summary statistics
         if comparison["papers"]:
-            comparison["avg_sample_size"] = sum(p["sample_size"] for p in comparison["papers"]) / len(comparison["papers"])
-            comparison["significant_count"] = sum(1 for p in comparison["papers"] if p["is_significant"])
+            comparison["avg_sample_size"] = total_sample_size / len(comparison["papers"])
+            comparison["significant_count"] = significant_count
         
         return comparison
 
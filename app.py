@@ -4,11 +4,15 @@ Copy this ENTIRE file into app.py
 """
 
 import streamlit as st
-from analyzer import ResearchPaperAnalyzer
+from analyzer import ResearchPaperAnalyzer, ANALYZER_VERSION, extract_pdf_text
 from dotenv import load_dotenv
 import os
-import tempfile
-import pandas as pd
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Load environment variables
 load_dotenv()
@@ -64,11 +68,59 @@ if not api_key or api_key == "paste_your_key_here":
     """)
     st.stop()
 
+# Number of papers analyzed concurrently
+MAX_WORKERS = 4
+
 # Initialize analyzer
 @st.cache_resource
 def get_analyzer():
     return ResearchPaperAnalyzer(api_key)
 
+# PyMuPDF is not thread-safe, so PDF parsing runs in spawned worker processes
+# (spawn avoids forking the multithreaded server process)
+@st.cache_resource
+def get_pdf_pool():
+    return ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+@st.cache_resource
+def get_pdf_pool_lock():
+    return threading.Lock()
+
+def extract_text_in_pool(pdf_bytes: bytes) -> str:
+    """Extract PDF text in the shared worker pool; a crashed worker fails this paper and the pool is replaced"""
+    pool = get_pdf_pool()
+    try:
+        return pool.submit(extract_pdf_text, pdf_bytes=pdf_bytes).result()
+    except BrokenProcessPool:
+        # Drop the broken pool unless another thread already replaced it; the next call builds a fresh one.
+        # The same bytes are not retried, since a PDF that crashes MuPDF would break the new pool too.
+        with get_pdf_pool_lock():
+            if get_pdf_pool() is pool:
+                get_pdf_pool.clear()
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise RuntimeError("PDF extraction worker crashed; the file may be corrupt or too large")
+
+# _pdf_bytes is excluded from Streamlit's hashing; file_key already identifies the content
+@st.cache_data(show_spinner=False, persist="disk")
+def analyze_bytes(file_key: str, _pdf_bytes: bytes, analyzer_version: str):
+    """Run the full analysis on raw PDF bytes; cached across sessions on content hash + analyzer version"""
+    analyzer = get_analyzer()
+    
+    text = extract_text_in_pool(_pdf_bytes)
+    
+    if not text or len(text) < 100:
+        return None
+    
+    summary = analyzer.generate_summary(text)
+    statistics = analyzer.extract_statistics(text)
+    significance = analyzer.analyze_statistical_significance(statistics)
+    
+    return {
+        'summary': summary,
+        'statistics': statistics,
+        'significance': significance
+    }
+
 try:
     analyzer = get_analyzer()
     st.sidebar.success("✅ API Connected")
@@ -150,57 +202,47 @@ if not uploaded_files:
         """)
 
 else:
-    # Process uploaded files
+    # Collect uploaded files that still need analysis
+    pending = {}
     for uploaded_file in uploaded_files:
-        file_key = uploaded_file.name
+        pdf_bytes = uploaded_file.getvalue()
+        file_key = hashlib.blake2b(pdf_bytes, digest_size=16).hexdigest()
         
         # Check if already analyzed
-        if file_key not in st.session_state.analyzed_papers:
-            with st.spinner(f"🔍 Analyzing **{uploaded_file.name}**... This may take 30-60 seconds..."):
-                try:
-                    # Save to temporary file
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                        tmp_file.write(uploaded_file.getvalue())
-                        tmp_path = tmp_file.name
-                    
-                    # Extract text
-                    with st.status("Extracting text from PDF..."):
-                        text = analyzer.extract_text_from_pdf(tmp_path)
+        if file_key not in st.session_state.analyzed_papers and file_key not in pending:
+            pending[file_key] = (uploaded_file.name, pdf_bytes)
+    
+    # Analyze new files concurrently; UI updates stay on the script thread
+    if pending:
+        with st.spinner(f"🔍 Analyzing **{len(pending)}** paper(s)... This may take 30-60 seconds..."):
+            ctx = get_script_run_ctx()
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS, initializer=add_script_run_ctx, initargs=(None, ctx)) as executor:
+                futures = {
+                    executor.submit(analyze_bytes, file_key, pdf_bytes, ANALYZER_VERSION): (file_key, file_name)
+                    for file_key, (file_name, pdf_bytes) in pending.items()
+                }
+                
+                for future in as_completed(futures):
+                    file_key, file_name = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        st.error(f"❌ Error processing {file_name}")
+                        st.error(f"Error details: {str(e)}")
+                        continue
                     
-                    if not text or len(text) < 100:
-                        st.error(f"⚠️ Could not extract enough text from {uploaded_file.name}")
+                    if result is None:
+                        st.error(f"⚠️ Could not extract enough text from {file_name}")
                         st.info("The PDF might be scanned images or protected. Try a different file.")
                         continue
                     
-                    # Generate summary
-                    with st.status("Generating AI summary..."):
-                        summary = analyzer.generate_summary(text)
-                    
-                    # Extract statistics
-                    with st.status("Extracting statistics..."):
-                        statistics = analyzer.extract_statistics(text)
-                    
-                    # Analyze significance
-                    with st.status("Analyzing statistical significance..."):
-                        significance = analyzer.analyze_statistical_significance(statistics)
-                    
                     # Store results
                     st.session_state.analyzed_papers[file_key] = {
-                        'summary': summary,
-                        'statistics': statistics,
-                        'significance': significance,
-                        'file_name': uploaded_file.name
+                        **result,
+                        'file_name': file_name
                     }
                     
-                    # Clean up
-                    os.unlink(tmp_path)
-                    
-                    st.success(f"✅ Successfully analyzed: {uploaded_file.name}")
-                    
-                except Exception as e:
-                    st.error(f"❌ Error processing {uploaded_file.name}")
-                    st.error(f"Error details: {str(e)}")
-                    continue
+                    st.success(f"✅ Successfully analyzed: {file_name}")
     
     # Display results in tabs
     tab1, tab2, tab3 = st.tabs(["📝 Summaries", "📊 Statistical Analysis", "🔄 Compare Papers"])
@@ -211,7 +253,8 @@ else:
         if not st.session_state.analyzed_papers:
             st.info("No papers analyzed yet. Upload PDFs to begin.")
         else:
-            for file_name, data in st.session_state.analyzed_papers.items():
+            for data in st.session_state.analyzed_papers.values():
+                file_name = data['file_name']
                 with st.expander(f"📄 **{file_name}**", expanded=True):
                     summary = data['summary']
                     
@@ -247,7 +290,8 @@ else:
         if not st.session_state.analyzed_papers:
             st.info("No papers analyzed yet. Upload PDFs to begin.")
         else:
-            for file_name, data in st.session_state.analyzed_papers.items():
+            for data in st.session_state.analyzed_papers.values():
+                file_name = data['file_name']
                 with st.expander(f"📊 **{file_name}**", expanded=True):
                     stats = data['statistics']
                     significance = data['significance']
@@ -339,7 +383,8 @@ else:
             # Create comparison table
             comparison_data = []
             
-            for file_name, data in st.session_state.analyzed_papers.items():
+            for data in st.session_state.analyzed_papers.values():
+                file_name = data['file_name']
                 stats = data['statistics']
                 summary = data['summary']
                 significance = data['significance']
@@ -355,7 +400,8 @@ else:
                     'Title': summary.get('title', 'Unknown')[:50]
                 })
             
-            # Display comparison table
+            # Display comparison table (pandas imported lazily; only needed here)
+            import pandas as pd
             df = pd.DataFrame(comparison_data)
             st.dataframe(df, use_container_width=True, hide_index=True)
             
@@ -364,10 +410,15 @@ else:
             # Comparison insights
             st.markdown("### 📈 Comparison Insights")
             
+            # Vectorized column views of the comparison table
+            sample_col = df['Sample Size'].to_numpy()
+            p_col = df['Min P-Value'].to_numpy()
+            significant_col = (df['Significant'] == '✅').to_numpy()
+            
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                total_significant = sum([1 for d in comparison_data if d['Significant'] == '✅'])
+                total_significant = int(significant_col.sum())
                 st.metric(
                     "Papers with Significant Results",
                     f"{total_significant} / {num_papers}",
@@ -375,14 +426,13 @@ else:
                 )
             
             with col2:
-                avg_sample = sum([d['Sample Size'] for d in comparison_data]) / len(comparison_data)
+                avg_sample = sample_col.mean()
                 st.metric("Average Sample Size", f"{avg_sample:,.0f}")
             
             with col3:
-                avg_p = sum([d['Min P-Value'] for d in comparison_data if d['Min P-Value'] < 1.0])
-                count_p = sum([1 for d in comparison_data if d['Min P-Value'] < 1.0])
-                if count_p > 0:
-                    st.metric("Average P-Value", f"{(avg_p/count_p):.4f}")
+                reported_p = p_col[p_col < 1.0]
+                if reported_p.size > 0:
+                    st.metric("Average P-Value", f"{reported_p.mean():.4f}")
                 else:
                     st.metric("Average P-Value", "N/A")
 